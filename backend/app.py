@@ -1,20 +1,53 @@
-import json
+import asyncio
+import hashlib
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import List, Optional
+from operator import attrgetter, itemgetter
+from typing import List, Literal, Optional
+from uuid import uuid4
 
+import anyio
+import jwt
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TLRUCache, TTLCache
 from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import JWTError, jwt
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import create_engine, case, event, func, insert, or_, update, Column, Index, Integer, JSON, String, DateTime, ForeignKey, Text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session, relationship
-from pydantic import BaseModel
+from sqlalchemy.orm import sessionmaker, raiseload, selectinload, Session, relationship
+from sqlalchemy.pool import QueuePool
+from pydantic import BaseModel, ConfigDict
 
-from config import settings
+from config import Settings, settings
 
 # --- Database Setup ---
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=QueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+)
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each pooled SQLite connection once, so its page cache stays warm across requests"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -30,8 +63,7 @@ class UserPublic(BaseModel):
     total_score: int
     quizzes_taken: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Token(BaseModel):
     access_token: str
@@ -44,8 +76,7 @@ class QuestionPublic(BaseModel):
     options: Optional[List[str]]
     points: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class QuizPublic(BaseModel):
     id: int
@@ -56,8 +87,7 @@ class QuizPublic(BaseModel):
     time_limit: int
     question_count: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class QuizDetail(QuizPublic):
     questions: List[QuestionPublic]
@@ -78,6 +108,41 @@ class QuizResultPublic(BaseModel):
     percentage: float
     time_taken: int
 
+class CollaboratorPublic(BaseModel):
+    quiz_id: int
+    username: str
+    role: str
+    status: str
+    invited_by: Optional[str]
+    invited_at: Optional[datetime]
+    joined_at: Optional[datetime]
+
+    model_config = ConfigDict(from_attributes=True)
+
+class InvitationPublic(BaseModel):
+    id: int
+    quiz_id: int
+    quiz_title: Optional[str]
+    inviter: str
+    invitee: str
+    role: str
+    status: str
+    created_at: datetime
+    responded_at: Optional[datetime]
+
+    model_config = ConfigDict(from_attributes=True)
+
+class InvitationResponse(BaseModel):
+    invitation_id: int
+    action: Literal["accept", "decline"]
+    username: str
+
+class InvitationResponses(BaseModel):
+    responses: List[InvitationResponse]
+
+class RemoverBody(BaseModel):
+    username: str
+
 # --- SQLAlchemy Models (Database Tables) ---
 class User(Base):
     __tablename__ = "users"
@@ -98,7 +163,8 @@ class Quiz(Base):
     difficulty = Column(String, nullable=False)
     time_limit = Column(Integer, default=300)
     created_at = Column(DateTime, default=datetime.utcnow)
-    questions = relationship('Question', back_populates='quiz', cascade='all, delete-orphan')
+    question_count = Column(Integer, default=0, nullable=False)  # Kept in sync by the Question hooks below
+    questions = relationship('Question', back_populates='quiz', cascade='all, delete-orphan', order_by='Question.order')
 
 class Question(Base):
     __tablename__ = "questions"
@@ -106,7 +172,7 @@ class Question(Base):
     quiz_id = Column(Integer, ForeignKey('quizzes.id'), nullable=False)
     question_text = Column(Text, nullable=False)
     question_type = Column(String, nullable=False)
-    options = Column(Text)
+    options = Column(JSON(none_as_null=True))  # Same TEXT storage as before on SQLite
     correct_answer = Column(String, nullable=False)
     points = Column(Integer, default=1)
     order = Column(Integer, default=0)
@@ -123,8 +189,86 @@ class QuizResult(Base):
     completed_at = Column(DateTime, default=datetime.utcnow)
     answers = Column(Text)
 
+# Collaboration quiz_ids refer to the in-memory quiz store, not the quizzes table. Those ids
+# restart with the process, so rows also carry the quiz's per-instance collaboration key and
+# only match the quiz instance they were created for (see quiz_keys_by_id)
+class Collaborator(Base):
+    __tablename__ = "quiz_collaborators"
+    id = Column(Integer, primary_key=True, index=True)
+    quiz_id = Column(Integer, nullable=False)
+    quiz_key = Column(String(32), nullable=False)
+    username = Column(String, nullable=False)
+    role = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="active")
+    invited_by = Column(String)
+    invited_at = Column(DateTime)
+    joined_at = Column(DateTime, default=datetime.utcnow)
+
+class Invitation(Base):
+    __tablename__ = "collaboration_invitations"
+    id = Column(Integer, primary_key=True, index=True)
+    quiz_id = Column(Integer, nullable=False)
+    quiz_key = Column(String(32), nullable=False)
+    quiz_title = Column(String)
+    inviter = Column(String, nullable=False)
+    invitee = Column(String, nullable=False)
+    role = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    created_at = Column(DateTime, default=datetime.utcnow)
+    responded_at = Column(DateTime)
+
+# Composite indexes matching the quiz filters, leaderboard join and question ordering
+Index("ix_quiz_cat_diff", Quiz.category, Quiz.difficulty)
+Index("ix_qr_user_score", QuizResult.user_id, QuizResult.score.desc())
+Index("ix_q_quiz_order", Question.quiz_id, Question.order)
+Index("ix_collab_quiz_status", Collaborator.quiz_key, Collaborator.status)
+Index("ix_collab_user_status", Collaborator.username, Collaborator.status)
+Index("ix_invitation_invitee_status", Invitation.invitee, Invitation.status)
+
+def _adjust_question_count(connection, quiz_id: int, delta: int):
+    quizzes_table = Quiz.__table__
+    connection.execute(
+        update(quizzes_table)
+        .where(quizzes_table.c.id == quiz_id)
+        .values(question_count=quizzes_table.c.question_count + delta)
+    )
+
+@event.listens_for(Question, "after_insert")
+def increment_question_count(mapper, connection, target):
+    _adjust_question_count(connection, target.quiz_id, 1)
+
+@event.listens_for(Question, "after_delete")
+def decrement_question_count(mapper, connection, target):
+    _adjust_question_count(connection, target.quiz_id, -1)
+
+def bulk_insert_questions(db: Session, quiz: Quiz, questions: List[dict]):
+    """Insert all questions of a flushed quiz with a single executemany INSERT"""
+    if not questions:
+        # An empty parameter list would make insert() emit a single all-defaults row
+        return
+    db.execute(insert(Question), [{**q_data, "quiz_id": quiz.id} for q_data in questions])
+    # Bulk inserts bypass the per-row hooks above, so count them here, in SQL like the hooks do
+    db.execute(
+        update(Quiz)
+        .where(Quiz.id == quiz.id)
+        .values(question_count=Quiz.question_count + len(questions))
+        .execution_options(synchronize_session=False)
+    )
+    db.expire(quiz, ["question_count"])
+
 # --- FastAPI App Initialization ---
-app = FastAPI()
+def orjson_default(obj):
+    # Lets list handlers return ORJSONResponse directly, skipping jsonable_encoder, with schema objects inside
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson instead of the stdlib json module"""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Add CORS middleware to allow frontend access
 from fastapi.middleware.cors import CORSMiddleware
@@ -145,9 +289,53 @@ def get_db():
     finally:
         db.close()
 
+def loader_options(*options):
+    """Return ORM loader options, forbidding any other lazy loads in debug mode"""
+    if settings.DEBUG:
+        return (*options, raiseload("*"))
+    return options
+
 # --- Authentication ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Decoded tokens keyed by sha256(token) -> (user id, username, exp); entries never outlive the token's exp.
+# The row is re-fetched per request so deleted/changed users take effect at once; the username is
+# re-checked because SQLite can hand a deleted user's id to the next registration
+token_cache = TLRUCache(
+    maxsize=10_000,
+    ttu=lambda _key, value, now: min(now + settings.TOKEN_CACHE_TTL_SECONDS, value[2]),
+    timer=time.time,
+)
+token_cache_lock = threading.Lock()
+
+password_hasher = PasswordHasher()
+
+# Recently verified sha256(stored hash NUL password) digests, so quick login retries skip argon2.
+# Keyed on the stored hash (which never contains NUL) so entries can't be replayed across users.
+verified_password_cache = TTLCache(maxsize=1000, ttl=settings.PASSWORD_VERIFY_CACHE_TTL_SECONDS)
+verified_password_cache_lock = threading.Lock()
+
+def is_password_hashed(stored_password: str) -> bool:
+    return stored_password.startswith("$argon2")
+
+def verify_password(password: str, password_hash: str) -> bool:
+    cache_key = hashlib.sha256(password_hash.encode() + b"\0" + password.encode()).digest()
+    with verified_password_cache_lock:
+        if cache_key in verified_password_cache:
+            return True
+    if not is_password_hashed(password_hash):
+        # Legacy rows stored the plaintext password; the login handler rehashes them on success
+        if not hmac.compare_digest(password_hash.encode(), password.encode()):
+            return False
+    else:
+        try:
+            password_hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    with verified_password_cache_lock:
+        verified_password_cache[cache_key] = True
+    return True
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -164,32 +352,113 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    token_key = hashlib.sha256(token.encode()).digest()
+    with token_cache_lock:
+        cached = token_cache.get(token_key)
+    if cached is not None:
+        user_id, cached_username, _exp = cached
+        user = db.get(User, user_id)
+        if user is None or user.username != cached_username:
+            with token_cache_lock:
+                token_cache.pop(token_key, None)
+            raise credentials_exception
+        return user
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-    except JWTError:
+    except jwt.InvalidTokenError:
         raise credentials_exception
     user = db.query(User).filter(User.username == username).first()
     if user is None:
         raise credentials_exception
+
+    with token_cache_lock:
+        token_cache[token_key] = (user.id, user.username, payload.get("exp", float("inf")))
     return user
 
 # --- Global Data Storage (minimal for compatibility) ---
+@dataclass(slots=True)
+class QuizAttempt:
+    """One /submit-quiz attempt; slotted since history grows with every submission"""
+    username: str
+    quiz_id: int
+    quiz_title: str
+    score: float
+    date: str
+    detailed_results: List[dict] = field(default_factory=list)
+
 quizzes = []
-quiz_history = []
-quiz_collaborators = []
-collaboration_invitations = []
+quiz_history: List[QuizAttempt] = []
+quiz_ratings_data = []
+
+# Lookup indexes over the stores above; only modify the stores via add_quiz/add_history_entry
+quizzes_by_id = {}
+quiz_keys_by_id = {}  # fresh random key per added quiz; scopes DB collaboration rows to it
+quizzes_by_category = defaultdict(list)  # keyed by lowercased category
+quizzes_by_creator = defaultdict(list)
+history_by_user = defaultdict(list)
+history_by_quiz_title = defaultdict(list)
+
+# Per-quiz analytics aggregates, updated as attempts are recorded
+SCORE_RANGES = ("0-25", "26-50", "51-75", "76-100")
+SCORE_RANGE_UPPER_BOUNDS = (25, 50, 75)
+score_totals_by_quiz_title = defaultdict(float)
+score_ranges_by_quiz_title = defaultdict(Counter)
+attempt_dates_by_quiz_title = defaultdict(Counter)
+
+def add_quiz(quiz: dict):
+    # Derive every index key before touching a store, so a bad quiz can't be half-registered
+    quiz_id = quiz["id"]
+    category_key = quiz["category"].lower()
+    creator_key = quiz.get("created_by")
+    quiz.setdefault("active_collaborator_count", 0)
+    quizzes.append(quiz)
+    quizzes_by_id[quiz_id] = quiz
+    quiz_keys_by_id[quiz_id] = uuid4().hex
+    quizzes_by_category[category_key].append(quiz)
+    quizzes_by_creator[creator_key].append(quiz)
+
+def add_history_entry(entry: QuizAttempt):
+    quiz_history.append(entry)
+    history_by_user[entry.username].append(entry)
+    history_by_quiz_title[entry.quiz_title].append(entry)
+    score_totals_by_quiz_title[entry.quiz_title] += entry.score
+    score_range = SCORE_RANGES[bisect_left(SCORE_RANGE_UPPER_BOUNDS, entry.score)]
+    score_ranges_by_quiz_title[entry.quiz_title][score_range] += 1
+    attempt_dates_by_quiz_title[entry.quiz_title][entry.date[:10]] += 1
+
+# C-level field accessors for the scans that can't use an index
+get_category = itemgetter("category")
+get_score = attrgetter("score")
+get_search_fields = itemgetter("title", "description", "category")
+
+def next_quiz_id() -> int:
+    return max(quizzes_by_id, default=0) + 1
 
 # --- API Endpoints ---
 def initialize_sample_data():
     """Initialize minimal quiz data for compatibility"""
-    global quizzes
-    quizzes = []
+    quizzes.clear()
+    quizzes_by_id.clear()
+    quiz_keys_by_id.clear()
+    quizzes_by_category.clear()
+    quizzes_by_creator.clear()
+    
+    # Persisted collaboration rows stay; their quiz keys no longer match any live quiz
+    with collaborators_cache_lock:
+        collaborators_cache.clear()
+        user_quizzes_cache.clear()
 
 @app.on_event("startup")
 def on_startup():
+    if not settings.DEBUG and settings.JWT_SECRET_KEY == Settings.model_fields["JWT_SECRET_KEY"].default:
+        raise RuntimeError("JWT_SECRET_KEY is still the placeholder default; set it in the environment or .env")
+    # Sync endpoints run in anyio's worker threads; size the limit to the DB pool so
+    # every worker can check out a connection instead of waiting on QueuePool
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
     Base.metadata.create_all(bind=engine)
     # Initialize sample quiz data for compatibility
     initialize_sample_data()
@@ -197,31 +466,40 @@ def on_startup():
 
 @app.post("/register", response_model=Token)
 def register(user: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.username == user.username).first():
-        raise HTTPException(status_code=400, detail="Username already exists")
-    if db.query(User).filter(User.email == user.email).first():
-        raise HTTPException(status_code=400, detail="Email already exists")
-    
-    db_user = User(username=user.username, email=user.email, password=user.password) # In production, hash this!
+    db_user = User(username=user.username, email=user.email, password=password_hasher.hash(user.password))
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Rely on the unique constraints; only look up which one clashed on failure
+        db.rollback()
+        duplicate = db.query(
+            func.max(case((User.username == user.username, 1), else_=0)).label("username_taken"),
+            func.max(case((User.email == user.email, 1), else_=0)).label("email_taken"),
+        ).filter(or_(User.username == user.username, User.email == user.email)).one()
+        if duplicate.username_taken:
+            raise HTTPException(status_code=400, detail="Username already exists")
+        raise HTTPException(status_code=400, detail="Email already exists")
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": db_user.username}, expires_delta=access_token_expires
+        data={"sub": user.username}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/token", response_model=Token)
 def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not user.password == form_data.password: # In production, use proper password hashing
+    if not user or not verify_password(form_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if not is_password_hashed(user.password):
+        # Upgrade legacy plaintext passwords the first time they're used
+        user.password = password_hasher.hash(form_data.password)
+        db.commit()
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
@@ -230,53 +508,43 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
 
 @app.get("/api/quizzes", response_model=List[QuizPublic])
 def get_quizzes(category: Optional[str] = None, difficulty: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(Quiz)
+    query = db.query(Quiz).options(*loader_options())
     if category:
         query = query.filter(Quiz.category == category)
     if difficulty:
         query = query.filter(Quiz.difficulty == difficulty)
-    quizzes = query.all()
-    return [{**quiz.__dict__, "question_count": len(quiz.questions)} for quiz in quizzes]
+    return [QuizPublic.model_validate(quiz) for quiz in query.all()]
 
 @app.get("/quizzes")
 def get_all_quizzes(db: Session = Depends(get_db)):
     """Get all quizzes from database"""
-    quizzes = db.query(Quiz).all()
-    quiz_list = []
-    for quiz in quizzes:
-        quiz_dict = {
-            "id": quiz.id,
-            "title": quiz.title,
-            "description": quiz.description,
-            "category": quiz.category,
-            "difficulty": quiz.difficulty,
-            "time_limit": quiz.time_limit,
-            "question_count": len(quiz.questions)
-        }
-        quiz_list.append(quiz_dict)
-    return {"quizzes": quiz_list}
+    # Select plain columns; building full Quiz instances isn't needed for a listing
+    rows = db.query(
+        Quiz.id,
+        Quiz.title,
+        Quiz.description,
+        Quiz.category,
+        Quiz.difficulty,
+        Quiz.time_limit,
+        Quiz.question_count
+    ).all()
+    return {"quizzes": [row._asdict() for row in rows]}
+
+LEADERBOARD_SIZE = 100
 
 @app.get("/leaderboard")
 def get_leaderboard(db: Session = Depends(get_db)):
     """Get leaderboard data from quiz results"""
-    # Get all quiz results and calculate stats per user
-    from sqlalchemy import func
-    
+    # Calculate the top users' stats entirely in SQL
+    total_score = func.coalesce(func.sum(QuizResult.score), 0)
     leaderboard_query = db.query(
         func.coalesce(User.username, 'Anonymous').label('username'),
-        func.sum(QuizResult.score).label('total_score'),
+        total_score.label('total_score'),
         func.count(QuizResult.id).label('quizzes_taken'),
-        func.avg(QuizResult.score).label('average_score')
-    ).join(User, QuizResult.user_id == User.id).group_by(User.username).order_by(func.sum(QuizResult.score).desc()).all()
-    
-    leaderboard = []
-    for entry in leaderboard_query:
-        leaderboard.append({
-            "username": entry.username,
-            "total_score": int(entry.total_score or 0),
-            "quizzes_taken": entry.quizzes_taken,
-            "average_score": round(float(entry.average_score or 0), 1)
-        })
+        func.round(func.coalesce(func.avg(QuizResult.score), 0), 1).label('average_score')
+    ).join(User, QuizResult.user_id == User.id).group_by(User.username).order_by(total_score.desc()).limit(LEADERBOARD_SIZE).all()
+    
+    leaderboard = [entry._asdict() for entry in leaderboard_query]
     
     # If no data, return sample data for demo
     if not leaderboard:
@@ -290,38 +558,17 @@ def get_leaderboard(db: Session = Depends(get_db)):
 
 @app.get("/api/quizzes/{quiz_id}", response_model=QuizDetail)
 def get_quiz(quiz_id: int, db: Session = Depends(get_db)):
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
+    quiz = db.query(Quiz).options(*loader_options(selectinload(Quiz.questions))).filter(Quiz.id == quiz_id).first()
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
-    # Manually process questions to fit the Pydantic model
-    questions_public = []
-    for q in sorted(quiz.questions, key=lambda x: x.order):
-        questions_public.append(
-            QuestionPublic(
-                id=q.id,
-                question_text=q.question_text,
-                question_type=q.question_type,
-                options=json.loads(q.options) if q.options else None,
-                points=q.points
-            )
-        )
-
-    return QuizDetail(
-        id=quiz.id,
-        title=quiz.title,
-        description=quiz.description,
-        category=quiz.category,
-        difficulty=quiz.difficulty,
-        time_limit=quiz.time_limit,
-        question_count=len(quiz.questions),
-        questions=questions_public
-    )
+    # Questions arrive sorted by the relationship's order_by
+    return QuizDetail.model_validate(quiz)
 
 @app.post("/submit-quiz")
 async def submit_quiz(submission: QuizSubmission):
     # Calculate score
-    quiz = next((q for q in quizzes if q["id"] == submission.quiz_id), None)
+    quiz = quizzes_by_id.get(submission.quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
@@ -345,23 +592,15 @@ async def submit_quiz(submission: QuizSubmission):
     
     score = (correct_answers / total_questions) * 100
     
-    # Add to leaderboard
-    leaderboard = []  
-    quiz_history = []  # Store user quiz attempts with detailed results
-    leaderboard_entry = {
-        "username": submission.username,
-        "quiz_title": quiz["title"],
-        "score": score,
-        "date": datetime.now().isoformat()
-    }
-    leaderboard.append(leaderboard_entry)
-    quiz_history.append({
-        "username": submission.username,
-        "quiz_title": quiz["title"],
-        "score": score,
-        "date": datetime.now().isoformat(),
-        "detailed_results": detailed_results
-    })
+    # Store user quiz attempt with detailed results
+    add_history_entry(QuizAttempt(
+        username=submission.username,
+        quiz_id=quiz["id"],
+        quiz_title=quiz["title"],
+        score=score,
+        date=datetime.now().isoformat(),
+        detailed_results=detailed_results
+    ))
     
     return {
         "score": score, 
@@ -373,7 +612,7 @@ async def submit_quiz(submission: QuizSubmission):
 @app.post("/create-quiz")
 async def create_quiz(quiz_data: dict):
     # Generate new quiz ID
-    new_id = max([q["id"] for q in quizzes]) + 1 if quizzes else 1
+    new_id = next_quiz_id()
     
     # Validate quiz data
     required_fields = ["title", "description", "category", "difficulty", "time_limit", "questions"]
@@ -381,6 +620,11 @@ async def create_quiz(quiz_data: dict):
         if field not in quiz_data:
             raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
     
+    # Text fields are lowercased for the category index and search
+    for field in ["title", "description", "category"]:
+        if not isinstance(quiz_data[field], str):
+            raise HTTPException(status_code=400, detail=f"Field {field} must be a string")
+    
     # Validate questions
     if len(quiz_data["questions"]) < 1:
         raise HTTPException(status_code=400, detail="Quiz must have at least 1 question")
@@ -407,31 +651,31 @@ async def create_quiz(quiz_data: dict):
         "average_score": 0
     }
     
-    quizzes.append(new_quiz)
+    add_quiz(new_quiz)
     return {"message": "Quiz created successfully", "quiz_id": new_id}
 
 @app.get("/categories")
 async def get_categories():
-    categories = list(set([quiz["category"] for quiz in quizzes]))
+    categories = list(set(map(get_category, quizzes)))
     return {"categories": categories}
 
 @app.get("/quizzes/category/{category}")
 async def get_quizzes_by_category(category: str):
-    filtered_quizzes = [quiz for quiz in quizzes if quiz["category"].lower() == category.lower()]
-    return {"quizzes": filtered_quizzes}
+    return {"quizzes": quizzes_by_category.get(category.lower(), [])}
+
+def filter_quizzes(search_term: str) -> List[dict]:
+    def matches(quiz: dict) -> bool:
+        title, description, category = get_search_fields(quiz)
+        return search_term in title.lower() or search_term in description.lower() or search_term in category.lower()
+    return list(filter(matches, quizzes))
 
 @app.get("/search")
 async def search_quizzes(q: str = ""):
     if not q:
         return {"quizzes": quizzes}
     
-    search_term = q.lower()
-    filtered_quizzes = [
-        quiz for quiz in quizzes 
-        if search_term in quiz["title"].lower() or 
-           search_term in quiz["description"].lower() or 
-           search_term in quiz["category"].lower()
-    ]
+    # Full substring scan; run it off the event loop so other requests keep flowing
+    filtered_quizzes = await asyncio.to_thread(filter_quizzes, q.lower())
     return {"quizzes": filtered_quizzes}
 
 @app.post("/quiz-history")
@@ -445,25 +689,26 @@ def submit_quiz_result(quiz_data: dict, db: Session = Depends(get_db)):
             score=quiz_data.get('score', 0),
             total_questions=quiz_data.get('total_questions', 0),
             time_taken=quiz_data.get('time_taken', 0),
-            answers=json.dumps(quiz_data.get('answers', {}))
+            answers=orjson.dumps(quiz_data.get('answers', {})).decode()
         )
         
+        # Flush to get the generated id, then commit once; no re-SELECT via refresh
         db.add(quiz_result)
+        db.flush()
+        result_id = quiz_result.id
         db.commit()
-        db.refresh(quiz_result)
         
-        return {"message": "Quiz result submitted successfully", "id": quiz_result.id}
+        return {"message": "Quiz result submitted successfully", "id": result_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to submit quiz result: {str(e)}")
 
 @app.get("/quiz-history/{username}")
 async def get_quiz_history(username: str):
-    user_history = [entry for entry in quiz_history if entry["username"] == username]
-    return {"history": user_history}
+    return {"history": history_by_user.get(username, [])}
 
 @app.get("/user-stats/{username}")
 async def get_user_stats(username: str):
-    user_attempts = [entry for entry in quiz_history if entry["username"] == username]
+    user_attempts = history_by_user.get(username, [])
     
     if not user_attempts:
         return {
@@ -475,18 +720,20 @@ async def get_user_stats(username: str):
             "quizzesCreated": 0
         }
     
-    total_score = sum(attempt["score"] for attempt in user_attempts)
+    scores = list(map(get_score, user_attempts))
+    total_score = sum(scores)
     average_score = total_score / len(user_attempts)
-    perfect_scores = len([attempt for attempt in user_attempts if attempt["score"] == 100])
+    perfect_scores = scores.count(100)
     
     # Get unique categories from user's quiz attempts
-    categories_explored = len(set([
-        next(q["category"] for q in quizzes if q["title"] == attempt["quiz_title"])
+    categories_explored = len(set(
+        quizzes_by_id[attempt.quiz_id]["category"]
         for attempt in user_attempts
-    ]))
+        if attempt.quiz_id in quizzes_by_id
+    ))
     
     # Count quizzes created by user
-    quizzes_created = len([q for q in quizzes if q.get("created_by") == username])
+    quizzes_created = len(quizzes_by_creator.get(username, []))
     
     return {
         "quizzesCompleted": len(user_attempts),
@@ -498,15 +745,34 @@ async def get_user_stats(username: str):
     }
 
 
+def build_question_analytics(quiz: dict, attempts: List[QuizAttempt]) -> List[dict]:
+    question_analytics = []
+    if attempts:
+        for i, question in enumerate(quiz["questions"]):
+            correct_count = 0
+            total_count = 0
+            for attempt in attempts:
+                if i < len(attempt.detailed_results):
+                    total_count += 1
+                    if attempt.detailed_results[i]["is_correct"]:
+                        correct_count += 1
+            
+            question_analytics.append({
+                "question": question["question"],
+                "correct_rate": (correct_count / total_count * 100) if total_count > 0 else 0,
+                "total_attempts": total_count
+            })
+    return question_analytics
+
 @app.get("/quiz-analytics/{quiz_id}")
 async def get_quiz_analytics(quiz_id: int):
     # Get quiz details
-    quiz = next((q for q in quizzes if q["id"] == quiz_id), None)
+    quiz = quizzes_by_id.get(quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
     # Get quiz attempts from history
-    attempts = [h for h in quiz_history if h.get("quiz_id") == quiz_id or h["quiz_title"] == quiz["title"]]
+    attempts = history_by_quiz_title.get(quiz["title"], [])
     
     if not attempts:
         return {
@@ -521,54 +787,23 @@ async def get_quiz_analytics(quiz_id: int):
     
     # Calculate analytics
     total_attempts = len(attempts)
-    average_score = sum(a["score"] for a in attempts) / total_attempts
-    
-    # Score distribution
-    score_ranges = {"0-25": 0, "26-50": 0, "51-75": 0, "76-100": 0}
-    for attempt in attempts:
-        score = attempt["score"]
-        if score <= 25:
-            score_ranges["0-25"] += 1
-        elif score <= 50:
-            score_ranges["26-50"] += 1
-        elif score <= 75:
-            score_ranges["51-75"] += 1
-        else:
-            score_ranges["76-100"] += 1
-    
-    # Attempts over time (group by date)
-    from collections import defaultdict
-    attempts_by_date = defaultdict(int)
-    for attempt in attempts:
-        date = attempt["date"][:10]  # Get date part only
-        attempts_by_date[date] += 1
+    average_score = score_totals_by_quiz_title[quiz["title"]] / total_attempts
     
-    attempts_over_time = [{"date": date, "count": count} for date, count in attempts_by_date.items()]
+    # Score distribution and attempts over time, pre-aggregated in add_history_entry
+    score_ranges = score_ranges_by_quiz_title[quiz["title"]]
+    attempts_over_time = [
+        {"date": date, "count": count} for date, count in attempt_dates_by_quiz_title[quiz["title"]].items()
+    ]
     
-    # Question analytics
-    question_analytics = []
-    if attempts and "detailed_results" in attempts[0]:
-        for i, question in enumerate(quiz["questions"]):
-            correct_count = 0
-            total_count = 0
-            for attempt in attempts:
-                if "detailed_results" in attempt and i < len(attempt["detailed_results"]):
-                    total_count += 1
-                    if attempt["detailed_results"][i]["is_correct"]:
-                        correct_count += 1
-            
-            question_analytics.append({
-                "question": question["question"],
-                "correct_rate": (correct_count / total_count * 100) if total_count > 0 else 0,
-                "total_attempts": total_count
-            })
+    # Question analytics scale with attempts x questions, so compute them off the event loop
+    question_analytics = await asyncio.to_thread(build_question_analytics, quiz, attempts)
     
     return {
         "quiz": quiz,
         "total_attempts": total_attempts,
         "average_score": round(average_score, 1),
         "completion_rate": 100,  # Assuming all started quizzes are completed
-        "score_distribution": [{"range": k, "count": v} for k, v in score_ranges.items()],
+        "score_distribution": [{"range": k, "count": score_ranges[k]} for k in SCORE_RANGES],
         "attempts_over_time": sorted(attempts_over_time, key=lambda x: x["date"]),
         "question_analytics": question_analytics
     }
@@ -576,25 +811,19 @@ async def get_quiz_analytics(quiz_id: int):
 @app.get("/creator-analytics/{username}")
 async def get_creator_analytics(username: str):
     # Get quizzes created by this user (mock data for now)
-    user_quizzes = [q for q in quizzes if q.get("created_by") == username]
+    user_quizzes = quizzes_by_creator.get(username, [])
     
     # Get all attempts for user's quizzes
     total_attempts = 0
     total_score = 0
-    attempt_count = 0
     
     quiz_performance = []
     for quiz in user_quizzes:
-        attempts = [h for h in quiz_history if h["quiz_title"] == quiz["title"]]
-        quiz_attempts = len(attempts)
+        quiz_attempts = len(history_by_quiz_title.get(quiz["title"], []))
+        quiz_score = score_totals_by_quiz_title.get(quiz["title"], 0)
         total_attempts += quiz_attempts
-        
-        if attempts:
-            avg_score = sum(a["score"] for a in attempts) / len(attempts)
-            total_score += sum(a["score"] for a in attempts)
-            attempt_count += len(attempts)
-        else:
-            avg_score = 0
+        total_score += quiz_score
+        avg_score = quiz_score / quiz_attempts if quiz_attempts else 0
         
         quiz_performance.append({
             "quiz_id": quiz["id"],
@@ -605,7 +834,7 @@ async def get_creator_analytics(username: str):
             "difficulty": quiz["difficulty"]
         })
     
-    overall_avg_score = (total_score / attempt_count) if attempt_count > 0 else 0
+    overall_avg_score = (total_score / total_attempts) if total_attempts > 0 else 0
     
     return {
         "total_quizzes": len(user_quizzes),
@@ -624,36 +853,39 @@ async def get_quiz_recommendations(username: str):
         "total_recommendations": min(6, len(quizzes))
     }
 
-@app.get("/export-quiz/{quiz_id}")
-async def export_quiz(quiz_id: int):
-    quiz = next((q for q in quizzes if q["id"] == quiz_id), None)
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Quiz not found")
-    
-    # Get quiz statistics for export
-    quiz_attempts = [h for h in quiz_history if h["quiz_title"] == quiz["title"]]
-    quiz_ratings = [r for r in quiz_ratings_data if r["quiz_id"] == quiz_id]
+def build_quiz_export(quiz: dict, export_date: str) -> dict:
+    """Export entry with the quiz data and its attempt/rating statistics"""
+    attempt_count = len(history_by_quiz_title.get(quiz["title"], []))
+    quiz_ratings = [r for r in quiz_ratings_data if r["quiz_id"] == quiz["id"]]
     
-    export_data = {
+    return {
         "quiz_data": {
             **quiz,
-            "export_date": datetime.now().isoformat(),
+            "export_date": export_date,
             "export_version": "1.0"
         },
         "statistics": {
-            "total_attempts": len(quiz_attempts),
-            "average_score": sum(a["score"] for a in quiz_attempts) / len(quiz_attempts) if quiz_attempts else 0,
+            "total_attempts": attempt_count,
+            "average_score": score_totals_by_quiz_title[quiz["title"]] / attempt_count if attempt_count else 0,
             "total_ratings": len(quiz_ratings),
             "average_rating": sum(r["rating"] for r in quiz_ratings) / len(quiz_ratings) if quiz_ratings else 0
-        },
+        }
+    }
+
+@app.get("/export-quiz/{quiz_id}")
+async def export_quiz(quiz_id: int):
+    quiz = quizzes_by_id.get(quiz_id)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    
+    return {
+        **build_quiz_export(quiz, datetime.now().isoformat()),
         "metadata": {
             "exported_by": "QuizMaster",
             "format_version": "1.0",
             "compatible_versions": ["1.0"]
         }
     }
-    
-    return export_data
 
 class QuizImport(BaseModel):
     quiz_data: dict
@@ -670,6 +902,11 @@ async def import_quiz(import_data: QuizImport):
             if field not in quiz_data:
                 raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
         
+        # Text fields are lowercased for the category index and search
+        for field in ["title", "description", "category"]:
+            if not isinstance(quiz_data[field], str):
+                raise HTTPException(status_code=400, detail=f"Field {field} must be a string")
+        
         # Validate questions format
         if not isinstance(quiz_data["questions"], list) or len(quiz_data["questions"]) == 0:
             raise HTTPException(status_code=400, detail="Quiz must have at least one question")
@@ -685,7 +922,7 @@ async def import_quiz(import_data: QuizImport):
         
         # Create new quiz with new ID
         new_quiz = {
-            "id": len(quizzes) + 1,
+            "id": next_quiz_id(),
             "title": quiz_data["title"],
             "description": quiz_data["description"],
             "category": quiz_data["category"],
@@ -702,7 +939,7 @@ async def import_quiz(import_data: QuizImport):
         }
         
         # Add to quizzes list
-        quizzes.append(new_quiz)
+        add_quiz(new_quiz)
         
         return {
             "message": "Quiz imported successfully",
@@ -723,47 +960,65 @@ async def export_multiple_quizzes(quiz_ids: str = ""):
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid quiz ID format")
     
-    exported_quizzes = []
-    for quiz_id in quiz_id_list:
-        quiz = next((q for q in quizzes if q["id"] == quiz_id), None)
-        if quiz:
-            quiz_attempts = [h for h in quiz_history if h["quiz_title"] == quiz["title"]]
-            quiz_ratings = [r for r in quiz_ratings_data if r["quiz_id"] == quiz_id]
-            
-            exported_quizzes.append({
-                "quiz_data": {
-                    **quiz,
-                    "export_date": datetime.now().isoformat(),
-                    "export_version": "1.0"
-                },
-                "statistics": {
-                    "total_attempts": len(quiz_attempts),
-                    "average_score": sum(a["score"] for a in quiz_attempts) / len(quiz_attempts) if quiz_attempts else 0,
-                    "total_ratings": len(quiz_ratings),
-                    "average_rating": sum(r["rating"] for r in quiz_ratings) / len(quiz_ratings) if quiz_ratings else 0
-                }
-            })
-    
-    export_package = {
-        "quizzes": exported_quizzes,
-        "export_metadata": {
-            "total_quizzes": len(exported_quizzes),
-            "export_date": datetime.now().isoformat(),
-            "exported_by": "QuizMaster",
-            "format_version": "1.0",
-            "package_type": "multiple_quizzes"
-        }
+    selected_quizzes = [quizzes_by_id[quiz_id] for quiz_id in quiz_id_list if quiz_id in quizzes_by_id]
+    export_metadata = {
+        "total_quizzes": len(selected_quizzes),
+        "export_date": datetime.now().isoformat(),
+        "exported_by": "QuizMaster",
+        "format_version": "1.0",
+        "package_type": "multiple_quizzes"
     }
     
-    return export_package
+    # Stream the package so only one quiz export is materialized at a time
+    def generate_export_package():
+        yield b'{"quizzes":['
+        for i, quiz in enumerate(selected_quizzes):
+            if i:
+                yield b','
+            yield orjson.dumps(build_quiz_export(quiz, export_metadata["export_date"]), option=orjson.OPT_NON_STR_KEYS)
+        yield b'],"export_metadata":' + orjson.dumps(export_metadata) + b'}'
+    
+    return StreamingResponse(generate_export_package(), media_type="application/json")
+
+# Collaborator listings per quiz_id; evicted on accept/remove, TTL bounds any staleness
+collaborators_cache = TTLCache(maxsize=1024, ttl=settings.COLLABORATORS_CACHE_TTL_SECONDS)
+collaborators_cache_lock = threading.Lock()
 
-# Quiz collaboration data structures
-quiz_collaborators = []  # [{quiz_id, username, role, status, invited_by, invited_at}]
-collaboration_invitations = []  # [{id, quiz_id, inviter, invitee, role, status, created_at}]
+# Merged collaborative-quiz listings per username; they embed quiz-level fields such as
+# active_collaborator_count, so any membership change evicts every member of that quiz
+user_quizzes_cache = TTLCache(maxsize=1024, ttl=settings.COLLABORATORS_CACHE_TTL_SECONDS)
+
+def is_live_collaboration(row) -> bool:
+    """Whether a Collaborator/Invitation row belongs to the quiz currently holding its quiz_id"""
+    return quiz_keys_by_id.get(row.quiz_id) == row.quiz_key
+
+def invalidate_collaborators_cache(db: Session, quiz_ids, usernames=()):
+    """Evict the quizzes' collaborator listings and the merged listings of all their members"""
+    quiz_ids = set(quiz_ids)
+    quiz_keys = [quiz_keys_by_id[quiz_id] for quiz_id in quiz_ids if quiz_id in quiz_keys_by_id]
+    members = {
+        username for (username,) in db.query(Collaborator.username).filter(
+            Collaborator.quiz_key.in_(quiz_keys), Collaborator.status == "active"
+        )
+    }
+    members.update(usernames)
+    with collaborators_cache_lock:
+        for quiz_id in quiz_ids:
+            collaborators_cache.pop(quiz_id, None)
+        for username in members:
+            user_quizzes_cache.pop(username, None)
+
+def adjust_active_collaborator_count(quiz_id: int, delta: int):
+    # Denormalized on the quiz dict so summaries don't have to count collaborator rows
+    # Handlers run on worker threads; hold the lock so concurrent accepts/removes don't lose updates
+    with collaborators_cache_lock:
+        quiz = quizzes_by_id.get(quiz_id)
+        if quiz:
+            quiz["active_collaborator_count"] = quiz.get("active_collaborator_count", 0) + delta
 
 # Quiz collaboration endpoints
 @app.post("/quiz-collaboration/invite")
-async def invite_collaborator(invitation: dict):
+def invite_collaborator(invitation: dict, db: Session = Depends(get_db)):
     """Invite a user to collaborate on a quiz"""
     quiz_id = invitation.get("quiz_id")
     inviter = invitation.get("inviter")
@@ -771,101 +1026,153 @@ async def invite_collaborator(invitation: dict):
     role = invitation.get("role", "editor")  # editor, reviewer, viewer
     
     # Check if quiz exists
-    quiz = next((q for q in quizzes if q["id"] == quiz_id), None)
+    quiz = quizzes_by_id.get(quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
+    quiz_key = quiz_keys_by_id[quiz_id]
     
     # Check if inviter is the owner or has admin rights
     if quiz["creator"] != inviter:
-        existing_collab = next((c for c in quiz_collaborators 
-                               if c["quiz_id"] == quiz_id and c["username"] == inviter 
-                               and c["role"] in ["admin", "owner"]), None)
+        existing_collab = db.query(Collaborator.id).filter(
+            Collaborator.quiz_key == quiz_key,
+            Collaborator.username == inviter,
+            Collaborator.role.in_(["admin", "owner"])
+        ).first()
         if not existing_collab:
             raise HTTPException(status_code=403, detail="Insufficient permissions")
     
     # Check if already invited or collaborating
-    existing_invitation = next((i for i in collaboration_invitations 
-                               if i["quiz_id"] == quiz_id and i["invitee"] == invitee 
-                               and i["status"] == "pending"), None)
+    existing_invitation = db.query(Invitation.id).filter_by(quiz_key=quiz_key, invitee=invitee, status="pending").first()
     if existing_invitation:
         raise HTTPException(status_code=400, detail="User already invited")
     
-    existing_collaborator = next((c for c in quiz_collaborators 
-                                 if c["quiz_id"] == quiz_id and c["username"] == invitee), None)
+    existing_collaborator = db.query(Collaborator.id).filter_by(quiz_key=quiz_key, username=invitee).first()
     if existing_collaborator:
         raise HTTPException(status_code=400, detail="User already collaborating")
     
     # Create invitation
-    invitation_id = len(collaboration_invitations) + 1
-    new_invitation = {
-        "id": invitation_id,
-        "quiz_id": quiz_id,
-        "inviter": inviter,
-        "invitee": invitee,
-        "role": role,
-        "status": "pending",
-        "created_at": datetime.now().isoformat(),
-        "quiz_title": quiz["title"]
-    }
-    
-    collaboration_invitations.append(new_invitation)
+    new_invitation = Invitation(
+        quiz_id=quiz_id,
+        quiz_key=quiz_key,
+        quiz_title=quiz["title"],
+        inviter=inviter,
+        invitee=invitee,
+        role=role
+    )
+    db.add(new_invitation)
+    db.flush()
+    invitation_id = new_invitation.id
+    db.commit()
     return {"message": "Invitation sent successfully", "invitation_id": invitation_id}
 
 @app.get("/quiz-collaboration/invitations/{username}")
-async def get_user_invitations(username: str):
+def get_user_invitations(username: str, db: Session = Depends(get_db)):
     """Get all pending invitations for a user"""
-    user_invitations = [
-        inv for inv in collaboration_invitations 
-        if inv["invitee"] == username and inv["status"] == "pending"
-    ]
-    return {"invitations": user_invitations}
+    invitations = db.query(Invitation).filter_by(invitee=username, status="pending").order_by(Invitation.id).all()
+    return {"invitations": [InvitationPublic.model_validate(inv) for inv in invitations if is_live_collaboration(inv)]}
 
-@app.post("/quiz-collaboration/respond-invitation")
-async def respond_to_invitation(response: dict):
-    """Accept or decline a collaboration invitation"""
-    invitation_id = response.get("invitation_id")
-    action = response.get("action")  # "accept" or "decline"
-    username = response.get("username")
-    
-    # Find invitation
-    invitation = next((i for i in collaboration_invitations if i["id"] == invitation_id), None)
-    if not invitation:
+def apply_invitation_response(db: Session, invitation: Optional[Invitation], action: str, username: str, now: datetime) -> Optional[Collaborator]:
+    """Validate and record one response; returns the new collaborator on accept"""
+    if not invitation or not is_live_collaboration(invitation):
         raise HTTPException(status_code=404, detail="Invitation not found")
     
-    if invitation["invitee"] != username:
+    if invitation.invitee != username:
         raise HTTPException(status_code=403, detail="Not authorized to respond to this invitation")
     
-    if invitation["status"] != "pending":
+    if invitation.status != "pending":
         raise HTTPException(status_code=400, detail="Invitation already responded to")
     
     # Update invitation status
-    invitation["status"] = "accepted" if action == "accept" else "declined"
-    invitation["responded_at"] = datetime.now().isoformat()
+    invitation.status = "accepted" if action == "accept" else "declined"
+    invitation.responded_at = now
     
     # If accepted, add to collaborators
-    if action == "accept":
-        collaborator = {
-            "quiz_id": invitation["quiz_id"],
-            "username": username,
-            "role": invitation["role"],
-            "status": "active",
-            "invited_by": invitation["inviter"],
-            "invited_at": invitation["created_at"],
-            "joined_at": datetime.now().isoformat()
-        }
-        quiz_collaborators.append(collaborator)
-        return {"message": "Invitation accepted", "collaborator": collaborator}
+    if action != "accept":
+        return None
+    collaborator = Collaborator(
+        quiz_id=invitation.quiz_id,
+        quiz_key=invitation.quiz_key,
+        username=username,
+        role=invitation.role,
+        status="active",
+        invited_by=invitation.inviter,
+        invited_at=invitation.created_at,
+        joined_at=now
+    )
+    db.add(collaborator)
+    return collaborator
+
+@app.post("/quiz-collaboration/respond-invitation")
+def respond_to_invitation(response: InvitationResponse, db: Session = Depends(get_db)):
+    """Accept or decline a collaboration invitation"""
+    username = response.username
+    
+    # Find invitation
+    invitation = db.get(Invitation, response.invitation_id)
+    collaborator = apply_invitation_response(db, invitation, response.action, username, datetime.now())
+    
+    if collaborator:
+        db.flush()
+        collaborator_public = CollaboratorPublic.model_validate(collaborator)
+        db.commit()
+        adjust_active_collaborator_count(invitation.quiz_id, 1)
+        invalidate_collaborators_cache(db, [invitation.quiz_id])
+        return {"message": "Invitation accepted", "collaborator": collaborator_public}
     else:
+        db.commit()
         return {"message": "Invitation declined"}
 
+@app.post("/quiz-collaboration/respond-invitations")
+def respond_to_invitations(payload: InvitationResponses, db: Session = Depends(get_db)):
+    """Accept or decline several invitations with one lookup and one commit"""
+    responses = payload.responses
+    
+    invitation_ids = {r.invitation_id for r in responses}
+    invitations_by_id = {
+        inv.id: inv for inv in db.query(Invitation).filter(Invitation.id.in_(invitation_ids))
+    } if invitation_ids else {}
+    
+    results = []
+    accepted = []
+    now = datetime.now()  # one timestamp for the whole batch
+    for response in responses:
+        invitation_id = response.invitation_id
+        try:
+            collaborator = apply_invitation_response(
+                db, invitations_by_id.get(invitation_id), response.action, response.username, now
+            )
+        except HTTPException as exc:
+            results.append({"invitation_id": invitation_id, "error": exc.detail})
+            continue
+        if collaborator:
+            accepted.append(collaborator)
+            results.append({"invitation_id": invitation_id, "message": "Invitation accepted"})
+        else:
+            results.append({"invitation_id": invitation_id, "message": "Invitation declined"})
+    
+    db.commit()
+    accepted_by_quiz = Counter(c.quiz_id for c in accepted)
+    for quiz_id, count in accepted_by_quiz.items():
+        adjust_active_collaborator_count(quiz_id, count)
+    if accepted_by_quiz:
+        invalidate_collaborators_cache(db, accepted_by_quiz)
+    return {"results": results}
+
 @app.get("/quiz-collaboration/{quiz_id}/collaborators")
-async def get_quiz_collaborators(quiz_id: int):
+def get_quiz_collaborators(quiz_id: int, db: Session = Depends(get_db)):
     """Get all collaborators for a quiz"""
-    quiz = next((q for q in quizzes if q["id"] == quiz_id), None)
+    quiz = quizzes_by_id.get(quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
-    collaborators = [c for c in quiz_collaborators if c["quiz_id"] == quiz_id and c["status"] == "active"]
+    with collaborators_cache_lock:
+        cached = collaborators_cache.get(quiz_id)
+    if cached is not None:
+        return ORJSONResponse(cached)
+    
+    collaborators = db.query(Collaborator).filter_by(
+        quiz_key=quiz_keys_by_id[quiz_id], status="active"
+    ).order_by(Collaborator.id).all()
     
     # Include quiz owner
     owner = {
@@ -873,26 +1180,34 @@ async def get_quiz_collaborators(quiz_id: int):
         "username": quiz["creator"],
         "role": "owner",
         "status": "active",
-        "joined_at": quiz.get("created_at", datetime.now().isoformat())
+        "joined_at": quiz.get("created_at") or datetime.now().isoformat()
     }
     
-    return {"collaborators": [owner] + collaborators}
+    result = {"collaborators": [owner] + [CollaboratorPublic.model_validate(c) for c in collaborators]}
+    with collaborators_cache_lock:
+        collaborators_cache[quiz_id] = result
+    return ORJSONResponse(result)
 
 @app.delete("/quiz-collaboration/{quiz_id}/collaborators/{username}")
-async def remove_collaborator(quiz_id: int, username: str, remover: dict):
+def remove_collaborator(quiz_id: int, username: str, remover: RemoverBody, db: Session = Depends(get_db)):
     """Remove a collaborator from a quiz"""
-    quiz = next((q for q in quizzes if q["id"] == quiz_id), None)
+    quiz = quizzes_by_id.get(quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
-    remover_username = remover.get("username")
+    remover_username = remover.username
+    
+    # Fetch the remover's and the target's rows together for the checks below
+    collaborators_by_username = {
+        c.username: c for c in db.query(Collaborator).filter(
+            Collaborator.quiz_key == quiz_keys_by_id[quiz_id], Collaborator.username.in_({remover_username, username})
+        )
+    }
     
     # Check permissions - only owner or admin can remove collaborators
     if quiz["creator"] != remover_username:
-        remover_collab = next((c for c in quiz_collaborators 
-                              if c["quiz_id"] == quiz_id and c["username"] == remover_username 
-                              and c["role"] == "admin"), None)
-        if not remover_collab:
+        remover_collab = collaborators_by_username.get(remover_username)
+        if not remover_collab or remover_collab.role != "admin":
             raise HTTPException(status_code=403, detail="Insufficient permissions")
     
     # Cannot remove the owner
@@ -900,29 +1215,40 @@ async def remove_collaborator(quiz_id: int, username: str, remover: dict):
         raise HTTPException(status_code=400, detail="Cannot remove quiz owner")
     
     # Find and remove collaborator
-    collaborator = next((c for c in quiz_collaborators 
-                        if c["quiz_id"] == quiz_id and c["username"] == username), None)
+    collaborator = collaborators_by_username.get(username)
     if not collaborator:
         raise HTTPException(status_code=404, detail="Collaborator not found")
     
-    quiz_collaborators.remove(collaborator)
+    was_active = collaborator.status == "active"
+    db.delete(collaborator)
+    db.commit()
+    if was_active:
+        adjust_active_collaborator_count(quiz_id, -1)
+    invalidate_collaborators_cache(db, [quiz_id], [username])
     return {"message": "Collaborator removed successfully"}
 
 @app.get("/quiz-collaboration/user/{username}/quizzes")
-async def get_user_collaborative_quizzes(username: str):
+def get_user_collaborative_quizzes(username: str, db: Session = Depends(get_db)):
     """Get all quizzes a user is collaborating on"""
-    user_collaborations = [c for c in quiz_collaborators 
-                          if c["username"] == username and c["status"] == "active"]
+    with collaborators_cache_lock:
+        cached = user_quizzes_cache.get(username)
+    if cached is not None:
+        return ORJSONResponse(cached)
+    
+    user_collaborations = db.query(Collaborator).filter_by(username=username, status="active").order_by(Collaborator.id).all()
     
     collaborative_quizzes = []
     for collab in user_collaborations:
-        quiz = next((q for q in quizzes if q["id"] == collab["quiz_id"]), None)
-        if quiz:
+        quiz = quizzes_by_id.get(collab.quiz_id)
+        if quiz and is_live_collaboration(collab):
             quiz_info = {
                 **quiz,
-                "collaboration_role": collab["role"],
-                "joined_at": collab["joined_at"]
+                "collaboration_role": collab.role,
+                "joined_at": collab.joined_at
             }
             collaborative_quizzes.append(quiz_info)
     
-    return {"collaborative_quizzes": collaborative_quizzes}
+    result = {"collaborative_quizzes": collaborative_quizzes}
+    with collaborators_cache_lock:
+        user_quizzes_cache[username] = result
+    return ORJSONResponse(result)
@@ -2,19 +2,45 @@
 Configuration settings for QuizMaster application using Pydantic.
 """
 
-from pydantic_settings import BaseSettings
+from typing import Optional
+
+from pydantic import model_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     # Database settings
     DATABASE_URL: str = "sqlite:///./quiz_dev.db"
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 30  # Capacity 50 keeps the derived threadpool above Starlette's 40
+    SQLITE_CACHE_SIZE_KB: int = 65536  # Page cache per connection
+
+    # Worker threads for sync (DB) endpoints; Starlette's default is 40. Defaults to the DB
+    # pool capacity (DB_POOL_SIZE + DB_MAX_OVERFLOW): extra threads would only queue on checkout
+    THREADPOOL_SIZE: Optional[int] = None
+
+    # Debug settings
+    DEBUG: bool = False  # Raise on unplanned ORM lazy loads
 
     # JWT settings
     SECRET_KEY: str = "dev-secret-key-change-in-production"
-    JWT_SECRET_KEY: str = "jwt-secret-change-in-production"
+    JWT_SECRET_KEY: str = "jwt-secret-change-in-production"  # Placeholder; startup refuses it unless DEBUG
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
+    TOKEN_CACHE_TTL_SECONDS: int = 300  # Max age of a cached token -> user id decode
+    PASSWORD_VERIFY_CACHE_TTL_SECONDS: int = 30  # Short on purpose: trades a little safety for cheaper retries
+    COLLABORATORS_CACHE_TTL_SECONDS: int = 5  # Collaborator listings; writers evict, TTL covers other workers
+
+    model_config = SettingsConfigDict(env_file=".env")
 
-    class Config:
-        env_file = ".env"
+    @model_validator(mode="after")
+    def size_threadpool_to_db_pool(self):
+        pool_capacity = self.DB_POOL_SIZE + self.DB_MAX_OVERFLOW
+        if self.THREADPOOL_SIZE is None:
+            self.THREADPOOL_SIZE = pool_capacity
+        elif self.THREADPOOL_SIZE > pool_capacity:
+            raise ValueError(
+                f"THREADPOOL_SIZE ({self.THREADPOOL_SIZE}) exceeds DB_POOL_SIZE + DB_MAX_OVERFLOW ({pool_capacity})"
+            )
+        return self
 
 settings = Settings()
@@ -2,6 +2,8 @@
 Main entry point for the QuizMaster backend application.
 """
 
+import sys
+
 import uvicorn
 from app import app
 
@@ -11,5 +13,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",  # uvloop has no Windows build
+        http="httptools",
         log_level="info"
     )
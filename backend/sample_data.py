@@ -2,9 +2,8 @@
 Sample data for QuizMaster application
 """
 
-import json
 from sqlalchemy.orm import Session
-from app import Quiz, Question, SessionLocal
+from app import Quiz, SessionLocal, bulk_insert_questions
 
 def create_sample_data():
     """Create sample quiz data for testing"""
@@ -74,17 +73,7 @@ def create_sample_data():
             }
         ]
         
-        for q_data in programming_questions:
-            question = Question(
-                quiz_id=programming_quiz.id,
-                question_text=q_data["question_text"],
-                question_type=q_data["question_type"],
-                options=json.dumps(q_data["options"]) if q_data["options"] else None,
-                correct_answer=q_data["correct_answer"],
-                points=q_data["points"],
-                order=q_data["order"]
-            )
-            db.add(question)
+        bulk_insert_questions(db, programming_quiz, programming_questions)
 
         # Data Science Quiz
         ds_quiz = Quiz(
@@ -137,17 +126,7 @@ def create_sample_data():
             }
         ]
         
-        for q_data in ds_questions:
-            question = Question(
-                quiz_id=ds_quiz.id,
-                question_text=q_data["question_text"],
-                question_type=q_data["question_type"],
-                options=json.dumps(q_data["options"]) if q_data["options"] else None,
-                correct_answer=q_data["correct_answer"],
-                points=q_data["points"],
-                order=q_data["order"]
-            )
-            db.add(question)
+        bulk_insert_questions(db, ds_quiz, ds_questions)
 
         # Mathematics Quiz
         math_quiz = Quiz(
@@ -187,17 +166,7 @@ def create_sample_data():
             }
         ]
         
-        for q_data in math_questions:
-            question = Question(
-                quiz_id=math_quiz.id,
-                question_text=q_data["question_text"],
-                question_type=q_data["question_type"],
-                options=json.dumps(q_data["options"]) if q_data["options"] else None,
-                correct_answer=q_data["correct_answer"],
-                points=q_data["points"],
-                order=q_data["order"]
-            )
-            db.add(question)
+        bulk_insert_questions(db, math_quiz, math_questions)
 
         # Advanced Programming Quiz
         advanced_quiz = Quiz(
@@ -247,17 +216,7 @@ def create_sample_data():
             }
         ]
         
-        for q_data in advanced_questions:
-            question = Question(
-                quiz_id=advanced_quiz.id,
-                question_text=q_data["question_text"],
-                question_type=q_data["question_type"],
-                options=json.dumps(q_data["options"]) if q_data["options"] else None,
-                correct_answer=q_data["correct_answer"],
-                points=q_data["points"],
-                order=q_data["order"]
-            )
-            db.add(question)
+        bulk_insert_questions(db, advanced_quiz, advanced_questions)
 
         db.commit()
         print("Sample data created successfully!")
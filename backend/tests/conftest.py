@@ -1,10 +1,14 @@
+import copy
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from app import app, get_db, Base
+from app import app, get_db, collaborators_cache, token_cache, user_quizzes_cache, verified_password_cache, Base
+from config import settings
+import app as app_module
 
 # Setup in-memory SQLite database for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -17,23 +21,70 @@ engine = create_engine(
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-@pytest.fixture(scope="function")
-def db():
+# Point the app itself at the test engine so the shared TestClient's startup hooks
+# never touch the developer's ./quiz_dev.db
+app_module.engine = engine
+app_module.SessionLocal = TestingSessionLocal
+
+# In-memory quiz/history stores and their indexes, swapped out per test
+QUIZ_STORES = (
+    "quizzes", "quizzes_by_id", "quiz_keys_by_id", "quizzes_by_category", "quizzes_by_creator",
+    "quiz_history", "history_by_user", "history_by_quiz_title",
+    "score_totals_by_quiz_title", "score_ranges_by_quiz_title", "attempt_dates_by_quiz_title",
+)
+
+# Make accidental lazy loads (N+1 queries) fail the tests
+settings.DEBUG = True
+# A 32+ byte key keeps PyJWT from warning about short HMAC secrets
+settings.JWT_SECRET_KEY = "test-jwt-secret-key-for-the-suite-only"
+
+# pysqlite defers BEGIN and mishandles SAVEPOINT; emit both ourselves so nested
+# transactions behave (see the SQLAlchemy "Serializable isolation / Savepoints" notes)
+@event.listens_for(engine, "connect")
+def disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+@event.listens_for(engine, "begin")
+def emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+@pytest.fixture(scope="session")
+def schema():
     """
-    Fixture to create a fresh database for each test function.
+    Fixture to create the database schema once for the whole test session.
     """
     Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="function")
+def db(schema):
+    """
+    Fixture to run each test inside an outer transaction that is rolled back.
+    Commits made by the app only release a SAVEPOINT, so nothing leaks between tests.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     try:
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=engine)
+        transaction.rollback()
+        connection.close()
+
+@pytest.fixture(scope="session")
+def _client():
+    """
+    Fixture to start the app once; startup hooks don't re-run per test.
+    """
+    with TestClient(app) as c:
+        yield c
 
 @pytest.fixture(scope="function")
-def client(db):
+def client(db, _client):
     """
-    Fixture to provide a TestClient with the database dependency overridden.
+    Fixture to provide the shared TestClient with the database dependency overridden.
     """
     def override_get_db():
         try:
@@ -42,6 +93,19 @@ def client(db):
             pass # db is closed in the db fixture
 
     app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as c:
-        yield c
+    yield _client
     app.dependency_overrides.clear()
+    token_cache.clear()
+    verified_password_cache.clear()
+    collaborators_cache.clear()
+    user_quizzes_cache.clear()
+
+@pytest.fixture(scope="function")
+def quiz_stores(monkeypatch):
+    """
+    Fixture to give each test its own empty in-memory stores instead of clearing shared globals.
+    """
+    for name in QUIZ_STORES:
+        store = copy.copy(getattr(app_module, name))  # keeps defaultdict factories
+        store.clear()
+        monkeypatch.setattr(app_module, name, store)
@@ -1,4 +1,8 @@
-from app import User
+import pytest
+from fastapi import HTTPException
+
+import app as app_module
+from app import User, get_current_user
 
 def test_register_user(client, db):
     response = client.post(
@@ -14,6 +18,8 @@ def test_register_user(client, db):
     user = db.query(User).filter(User.username == "testuser").first()
     assert user is not None
     assert user.email == "test@example.com"
+    assert user.password != "password123"
+    assert user.password.startswith("$argon2")
 
 def test_register_duplicate_username(client):
     # First registration
@@ -72,3 +78,73 @@ def test_login_invalid_credentials(client):
     )
     assert response.status_code == 401
     assert response.json()["detail"] == "Incorrect username or password"
+
+def test_current_user_cached_by_token(client, db, monkeypatch):
+    response = client.post(
+        "/register",
+        json={"username": "testuser", "email": "test@example.com", "password": "password123"},
+    )
+    token = response.json()["access_token"]
+
+    user = get_current_user(token=token, db=db)
+    assert user.username == "testuser"
+
+    # Second lookup skips JWT decoding but still reads the user row
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("token should have been served from the cache")
+    monkeypatch.setattr(app_module.jwt, "decode", fail_decode)
+    assert get_current_user(token=token, db=db).username == "testuser"
+
+    # A deleted user loses access immediately, even with a cached token
+    db.delete(user)
+    db.commit()
+    with pytest.raises(HTTPException):
+        get_current_user(token=token, db=db)
+
+def test_cached_token_rejected_when_user_id_is_reused(client, db):
+    token = client.post(
+        "/register",
+        json={"username": "alice_x", "email": "alice@example.com", "password": "password123"},
+    ).json()["access_token"]
+    alice = get_current_user(token=token, db=db)
+    alice_id = alice.id
+
+    # SQLite reuses the highest rowid once it is deleted
+    db.delete(alice)
+    db.commit()
+    client.post(
+        "/register",
+        json={"username": "bob_x", "email": "bob@example.com", "password": "password123"},
+    )
+    assert db.query(User).filter(User.username == "bob_x").one().id == alice_id
+
+    with pytest.raises(HTTPException):
+        get_current_user(token=token, db=db)
+    assert len(app_module.token_cache) == 0
+
+def test_password_cache_not_shared_across_colliding_usernames(client):
+    # "alice:foo" + "bar" and "alice" + "foo:bar" join to the same "username:password" string
+    client.post(
+        "/register",
+        json={"username": "alice:foo", "email": "a1@example.com", "password": "bar"},
+    )
+    client.post(
+        "/register",
+        json={"username": "alice", "email": "a2@example.com", "password": "secret123"},
+    )
+    assert client.post("/token", data={"username": "alice:foo", "password": "bar"}).status_code == 200
+
+    response = client.post("/token", data={"username": "alice", "password": "foo:bar"})
+    assert response.status_code == 401
+
+def test_login_upgrades_legacy_plaintext_password(client, db):
+    db.add(User(username="legacy", email="legacy@example.com", password="password123"))
+    db.commit()
+
+    assert client.post("/token", data={"username": "legacy", "password": "wrong"}).status_code == 401
+    response = client.post("/token", data={"username": "legacy", "password": "password123"})
+    assert response.status_code == 200
+
+    user = db.query(User).filter(User.username == "legacy").first()
+    assert user.password.startswith("$argon2")
+    assert client.post("/token", data={"username": "legacy", "password": "password123"}).status_code == 200
@@ -0,0 +1,158 @@
+import threading
+
+import pytest
+import app
+
+
+@pytest.fixture(autouse=True)
+def collaboration_quiz(client, quiz_stores):
+    # quiz_stores gives each test fresh stores; client comes first only so the one-time
+    # startup reset of the shared TestClient can't clear this quiz in the first test
+    app.add_quiz({
+        "id": 1,
+        "title": "Shared Quiz",
+        "description": "A quiz with collaborators",
+        "category": "General Knowledge",
+        "difficulty": "Easy",
+        "time_limit": 60,
+        "questions": [],
+        "creator": "owner",
+        "created_at": "2024-01-01T00:00:00",
+    })
+
+def invite(client, invitee, inviter="owner", role="editor"):
+    return client.post("/quiz-collaboration/invite", json={
+        "quiz_id": 1, "inviter": inviter, "invitee": invitee, "role": role
+    })
+
+def respond(client, invitation_id, username, action="accept"):
+    return client.post("/quiz-collaboration/respond-invitation", json={
+        "invitation_id": invitation_id, "action": action, "username": username
+    })
+
+def test_invite_and_list_pending_invitations(client):
+    response = invite(client, "alice")
+    assert response.status_code == 200
+    invitation_id = response.json()["invitation_id"]
+
+    assert invite(client, "alice").json()["detail"] == "User already invited"
+    assert invite(client, "bob", inviter="mallory").status_code == 403
+
+    invitations = client.get("/quiz-collaboration/invitations/alice").json()["invitations"]
+    assert [inv["id"] for inv in invitations] == [invitation_id]
+
+def test_accept_invitation_adds_collaborator(client):
+    invitation_id = invite(client, "alice").json()["invitation_id"]
+
+    assert respond(client, invitation_id, "bob").status_code == 403
+    response = respond(client, invitation_id, "alice")
+    assert response.status_code == 200
+    assert response.json()["message"] == "Invitation accepted"
+    assert respond(client, invitation_id, "alice").status_code == 400
+    assert respond(client, invitation_id, "alice", action="maybe").status_code == 422
+
+    assert client.get("/quiz-collaboration/invitations/alice").json()["invitations"] == []
+
+    collaborators = client.get("/quiz-collaboration/1/collaborators").json()["collaborators"]
+    assert [(c["username"], c["role"]) for c in collaborators] == [("owner", "owner"), ("alice", "editor")]
+
+    quizzes = client.get("/quiz-collaboration/user/alice/quizzes").json()["collaborative_quizzes"]
+    assert [(q["id"], q["collaboration_role"]) for q in quizzes] == [(1, "editor")]
+
+def test_decline_invitation(client):
+    invitation_id = invite(client, "alice").json()["invitation_id"]
+
+    response = respond(client, invitation_id, "alice", action="decline")
+    assert response.json()["message"] == "Invitation declined"
+    collaborators = client.get("/quiz-collaboration/1/collaborators").json()["collaborators"]
+    assert [c["username"] for c in collaborators] == ["owner"]
+
+def test_respond_to_invitations_in_batch(client):
+    alice_id = invite(client, "alice").json()["invitation_id"]
+    bob_id = invite(client, "bob").json()["invitation_id"]
+
+    response = client.post("/quiz-collaboration/respond-invitations", json={"responses": [
+        {"invitation_id": alice_id, "action": "accept", "username": "alice"},
+        {"invitation_id": bob_id, "action": "decline", "username": "bob"},
+        {"invitation_id": alice_id, "action": "accept", "username": "alice"},
+        {"invitation_id": 999, "action": "accept", "username": "carol"},
+    ]})
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"invitation_id": alice_id, "message": "Invitation accepted"},
+        {"invitation_id": bob_id, "message": "Invitation declined"},
+        {"invitation_id": alice_id, "error": "Invitation already responded to"},
+        {"invitation_id": 999, "error": "Invitation not found"},
+    ]
+
+    collaborators = client.get("/quiz-collaboration/1/collaborators").json()["collaborators"]
+    assert [c["username"] for c in collaborators] == ["owner", "alice"]
+    assert app.quizzes_by_id[1]["active_collaborator_count"] == 1
+
+def test_remove_collaborator(client):
+    respond(client, invite(client, "alice", role="admin").json()["invitation_id"], "alice")
+    respond(client, invite(client, "bob").json()["invitation_id"], "bob")
+    assert len(client.get("/quiz-collaboration/user/bob/quizzes").json()["collaborative_quizzes"]) == 1
+
+    url = "/quiz-collaboration/1/collaborators"
+    assert [c["username"] for c in client.get(url).json()["collaborators"]] == ["owner", "alice", "bob"]
+    assert client.request("DELETE", f"{url}/alice", json={"username": "bob"}).status_code == 403
+    assert client.request("DELETE", f"{url}/owner", json={"username": "alice"}).status_code == 400
+    assert client.request("DELETE", f"{url}/bob", json={}).status_code == 422
+
+    response = client.request("DELETE", f"{url}/bob", json={"username": "alice"})
+    assert response.status_code == 200
+    assert client.request("DELETE", f"{url}/bob", json={"username": "owner"}).status_code == 404
+
+    collaborators = client.get(url).json()["collaborators"]
+    assert [c["username"] for c in collaborators] == ["owner", "alice"]
+    assert client.get("/quiz-collaboration/user/bob/quizzes").json()["collaborative_quizzes"] == []
+    assert app.quizzes_by_id[1]["active_collaborator_count"] == 1
+
+def test_member_listings_refresh_when_other_users_join_or_leave(client):
+    respond(client, invite(client, "alice").json()["invitation_id"], "alice")
+
+    def alice_count():
+        quizzes = client.get("/quiz-collaboration/user/alice/quizzes").json()["collaborative_quizzes"]
+        return quizzes[0]["active_collaborator_count"]
+
+    assert alice_count() == 1
+    respond(client, invite(client, "bob").json()["invitation_id"], "bob")
+    assert alice_count() == 2
+    client.request("DELETE", "/quiz-collaboration/1/collaborators/bob", json={"username": "owner"})
+    assert alice_count() == 1
+
+def test_collaborations_do_not_reattach_to_a_reused_quiz_id(client, db):
+    respond(client, invite(client, "alice", role="admin").json()["invitation_id"], "alice")
+    bob_invitation = invite(client, "bob").json()["invitation_id"]
+
+    # Simulate a restart: the in-memory quizzes are rebuilt and the next quiz reuses id 1
+    app.initialize_sample_data()
+    app.add_quiz({
+        "id": app.next_quiz_id(), "title": "New Quiz", "description": "", "category": "Science",
+        "difficulty": "Easy", "time_limit": 60, "questions": [], "creator": "newowner",
+    })
+
+    collaborators = client.get("/quiz-collaboration/1/collaborators").json()["collaborators"]
+    assert [c["username"] for c in collaborators] == ["newowner"]
+    assert client.get("/quiz-collaboration/invitations/bob").json()["invitations"] == []
+    assert client.get("/quiz-collaboration/user/alice/quizzes").json()["collaborative_quizzes"] == []
+    assert respond(client, bob_invitation, "bob").status_code == 404
+    response = client.request("DELETE", "/quiz-collaboration/1/collaborators/carol", json={"username": "alice"})
+    assert response.status_code == 403
+
+    # The persisted rows themselves survive the reset
+    assert db.query(app.Collaborator).count() == 1
+    assert db.query(app.Invitation).count() == 2
+
+def test_active_collaborator_count_survives_concurrent_updates():
+    def bump():
+        for _ in range(1000):
+            app.adjust_active_collaborator_count(1, 1)
+
+    threads = [threading.Thread(target=bump) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert app.quizzes_by_id[1]["active_collaborator_count"] == 8000
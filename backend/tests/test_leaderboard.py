@@ -0,0 +1,27 @@
+from app import User, QuizResult
+
+
+def test_leaderboard_ranks_users_by_total_score(client, db):
+    alice = User(username="alice", email="alice@example.com", password="pw")
+    bob = User(username="bob", email="bob@example.com", password="pw")
+    db.add_all([alice, bob])
+    db.flush()
+    db.add_all([
+        QuizResult(user_id=alice.id, quiz_id=1, score=50, total_questions=2),
+        QuizResult(user_id=bob.id, quiz_id=1, score=90, total_questions=2),
+        QuizResult(user_id=alice.id, quiz_id=1, score=75, total_questions=2),
+    ])
+    db.commit()
+
+    response = client.get("/leaderboard")
+    assert response.status_code == 200
+    assert response.json()["leaderboard"] == [
+        {"username": "alice", "total_score": 125, "quizzes_taken": 2, "average_score": 62.5},
+        {"username": "bob", "total_score": 90, "quizzes_taken": 1, "average_score": 90.0},
+    ]
+
+
+def test_leaderboard_falls_back_to_demo_data(client):
+    response = client.get("/leaderboard")
+    assert response.status_code == 200
+    assert len(response.json()["leaderboard"]) == 3
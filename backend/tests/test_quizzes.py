@@ -2,12 +2,8 @@ import pytest
 import app
 
 
-# Helper to clear global quizzes list
-@pytest.fixture(autouse=True)
-def clear_quizzes():
-    app.quizzes.clear()
-    yield
-    app.quizzes.clear()
+# Every test gets fresh, monkeypatched quiz stores
+pytestmark = pytest.mark.usefixtures("quiz_stores")
 
 def test_create_quiz(client):
     quiz_data = {
@@ -45,6 +41,24 @@ def test_create_quiz_validation_error(client):
     # Looking at app.py:372 create_quiz(quiz_data: dict)
     # It manually checks fields.
     
+def test_non_string_category_leaves_no_partial_quiz(client):
+    quiz_data = {
+        "title": "Bad Category", "description": "d", "category": None, "difficulty": "Easy",
+        "time_limit": 60, "questions": [{"question": "Q?", "options": ["a", "b"], "correct": "A"}],
+    }
+    response = client.post("/create-quiz", json=quiz_data)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Field category must be a string"
+
+    response = client.post("/import-quiz", json={"quiz_data": {**quiz_data, "category": 5}})
+    assert response.status_code == 400
+    assert app.quizzes == [] and app.quizzes_by_id == {}
+
+    # add_quiz itself fails before touching any store
+    with pytest.raises(AttributeError):
+        app.add_quiz({**quiz_data, "id": 1, "category": 5})
+    assert app.quizzes == [] and app.quizzes_by_id == {} and app.quiz_keys_by_id == {}
+
 def test_get_quizzes_db(client, db):
     # This endpoint reads from DB, so we need to insert into DB.
     # We can't use create_quiz endpoint as it writes to global list.
@@ -141,3 +155,195 @@ def test_submit_quiz(client):
     assert len(data["detailed_results"]) == 2
     assert data["detailed_results"][0]["is_correct"] is True
     assert data["detailed_results"][1]["is_correct"] is False
+
+def test_submitted_attempts_feed_history_and_stats(client):
+    quiz_data = {
+        "title": "Geo Quiz",
+        "description": "Capitals",
+        "category": "Geography",
+        "difficulty": "Easy",
+        "time_limit": 60,
+        "questions": [
+            {
+                "question": "Capital of France?",
+                "options": ["Paris", "Rome", "Madrid", "Berlin"],
+                "correct": "A"
+            }
+        ]
+    }
+    quiz_id = client.post("/create-quiz", json=quiz_data).json()["quiz_id"]
+    client.post("/submit-quiz", json={
+        "quiz_id": quiz_id,
+        "username": "testuser",
+        "answers": [{"question_id": 0, "answer": "A"}],
+        "time_taken": 10
+    })
+
+    response = client.get("/quizzes/category/geography")
+    assert [q["title"] for q in response.json()["quizzes"]] == ["Geo Quiz"]
+
+    history = client.get("/quiz-history/testuser").json()["history"]
+    assert len(history) == 1
+    assert history[0]["quiz_id"] == quiz_id
+
+    stats = client.get("/user-stats/testuser").json()
+    assert stats["quizzesCompleted"] == 1
+    assert stats["perfectScores"] == 1
+    assert stats["categoriesExplored"] == 1
+
+    analytics = client.get(f"/quiz-analytics/{quiz_id}").json()
+    assert analytics["total_attempts"] == 1
+    assert analytics["average_score"] == 100.0
+    assert analytics["score_distribution"] == [
+        {"range": "0-25", "count": 0},
+        {"range": "26-50", "count": 0},
+        {"range": "51-75", "count": 0},
+        {"range": "76-100", "count": 1},
+    ]
+    assert [day["count"] for day in analytics["attempts_over_time"]] == [1]
+
+    creator = client.get("/creator-analytics/Anonymous").json()
+    assert creator["total_quizzes"] == 1
+    assert creator["total_attempts"] == 1
+    assert creator["overall_average_score"] == 100.0
+
+def test_question_count_tracks_questions(client, db):
+    from app import Quiz, Question
+
+    quiz = Quiz(title="Counted Quiz", category="Science", difficulty="Easy", time_limit=60)
+    quiz.questions = [
+        Question(question_text=f"Q{i}", question_type="multiple_choice", correct_answer="A", order=i)
+        for i in range(3)
+    ]
+    db.add(quiz)
+    db.commit()
+    assert quiz.question_count == 3
+
+    db.delete(quiz.questions[0])
+    db.commit()
+    assert quiz.question_count == 2
+
+    response = client.get("/api/quizzes")
+    assert response.json()[0]["question_count"] == 2
+
+def test_bulk_insert_questions_counts_in_sql(db):
+    from app import Quiz, bulk_insert_questions
+
+    quiz = Quiz(title="Bulk Quiz", category="Science", difficulty="Easy", time_limit=60)
+    db.add(quiz)
+    db.flush()
+    questions = [
+        {"question_text": f"Q{i}", "question_type": "multiple_choice", "correct_answer": "A", "order": i}
+        for i in range(4)
+    ]
+    bulk_insert_questions(db, quiz, questions[:2])
+    bulk_insert_questions(db, quiz, questions[2:])
+    bulk_insert_questions(db, quiz, [])
+    db.commit()
+
+    assert quiz.question_count == 4
+    assert len(quiz.questions) == 4
+
+def test_submit_quiz_result_db(client, db):
+    from app import QuizResult
+
+    response = client.post("/quiz-history", json={"score": 80, "total_questions": 5, "time_taken": 42})
+    assert response.status_code == 200
+    result_id = response.json()["id"]
+
+    result = db.get(QuizResult, result_id)
+    assert result.score == 80
+    assert result.total_questions == 5
+
+def test_get_quiz_detail_db(client, db):
+    from app import Quiz, Question
+
+    quiz = Quiz(title="Ordered Quiz", category="Science", difficulty="Easy", time_limit=60)
+    quiz.questions = [
+        Question(question_text="Second", question_type="multiple_choice",
+                 options=["a", "b"], correct_answer="a", order=2),
+        Question(question_text="First", question_type="text", correct_answer="x", order=1),
+    ]
+    db.add(quiz)
+    db.commit()
+
+    response = client.get(f"/api/quizzes/{quiz.id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["question_count"] == 2
+    assert [q["question_text"] for q in data["questions"]] == ["First", "Second"]
+    assert data["questions"][0]["options"] is None
+    assert data["questions"][1]["options"] == ["a", "b"]
+
+def test_export_quiz(client):
+    quiz_data = {
+        "title": "Export Quiz",
+        "description": "To be exported",
+        "category": "General Knowledge",
+        "difficulty": "Easy",
+        "time_limit": 60,
+        "questions": [
+            {"question": "2+2?", "options": ["3", "4"], "correct": "B"}
+        ]
+    }
+    quiz_id = client.post("/create-quiz", json=quiz_data).json()["quiz_id"]
+
+    response = client.get(f"/export-quiz/{quiz_id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["quiz_data"]["title"] == "Export Quiz"
+    assert data["statistics"]["total_attempts"] == 0
+
+    assert client.get("/export-quiz/999").status_code == 404
+
+def test_export_multiple_quizzes(client):
+    quiz_ids = []
+    for title in ["First Export", "Second Export"]:
+        quiz_data = {
+            "title": title,
+            "description": "To be exported",
+            "category": "General Knowledge",
+            "difficulty": "Easy",
+            "time_limit": 60,
+            "questions": [
+                {"question": "2+2?", "options": ["3", "4"], "correct": "B"}
+            ]
+        }
+        quiz_ids.append(client.post("/create-quiz", json=quiz_data).json()["quiz_id"])
+
+    response = client.get(f"/export-multiple-quizzes?quiz_ids={quiz_ids[0]},{quiz_ids[1]},999")
+    assert response.status_code == 200
+    data = response.json()
+    assert [q["quiz_data"]["title"] for q in data["quizzes"]] == ["First Export", "Second Export"]
+    assert data["export_metadata"]["total_quizzes"] == 2
+
+    assert client.get("/export-multiple-quizzes?quiz_ids=abc").status_code == 400
+
+def test_get_quizzes_query_count_is_constant(client, db):
+    from sqlalchemy import event
+    from app import Quiz, Question
+    from tests.conftest import engine
+
+    for i in range(5):
+        quiz = Quiz(title=f"Quiz {i}", category="Science", difficulty="Easy", time_limit=60)
+        quiz.questions = [
+            Question(question_text="Q", question_type="multiple_choice", correct_answer="A", order=j)
+            for j in range(3)
+        ]
+        db.add(quiz)
+    db.commit()
+
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        response = client.get("/api/quizzes")
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    assert response.status_code == 200
+    assert [q["question_count"] for q in response.json()] == [3] * 5
+    # One SELECT for the list; no per-quiz question loads (SAVEPOINTs come from the db fixture)
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1